@@ -1,6 +1,7 @@
 import time
 import sys
 from playwright.sync_api import TimeoutError, Error as PlaywrightError
+from utils.url_helper import match_google_signin
 
 
 class CookieValidator:
@@ -24,40 +25,53 @@ class CookieValidator:
         """
         在主线程中执行Cookie验证（由主线程调用）
 
+        通过上下文共享Cookie的HTTP请求访问验证URL并跟随重定向，
+        无需打开标签页渲染整个页面。HTTP请求只跟随服务端 3xx 重定向，
+        不执行页面脚本，因此还会检查状态码，并在响应内容中查找脚本发起的登录页跳转。
+
         Returns:
             bool: Cookie是否有效
         """
-        validation_page = None
         try:
-            # 创建新标签页（在主线程中执行）
             self.logger.info("开始Cookie验证...")
-            validation_page = self.context.new_page()
 
-            # 访问验证URL
+            # 访问验证URL（context.request 与浏览器上下文共享Cookie）
             validation_url = "https://aistudio.google.com/apps"
-            validation_page.goto(validation_url, wait_until='domcontentloaded', timeout=30000)
-
-            # 等待页面加载
-            validation_page.wait_for_timeout(2000)
-
-            # 获取最终URL
-            final_url = validation_page.url
+            response = self.context.request.get(validation_url, max_redirects=10, timeout=30000)
+            try:
+                # 获取重定向后的最终URL
+                final_url = response.url
+                status = response.status
+                body = response.text() if response.ok else ""
+            finally:
+                response.dispose()
 
             # 检查是否被重定向到登录页面
-            if "accounts.google.com/v3/signin/identifier" in final_url:
+            signin_page = match_google_signin(final_url)
+            if signin_page == "identifier":
                 self.logger.error("Cookie验证失败: 被重定向到登录页面")
                 return False
 
-            if "accounts.google.com/v3/signin/accountchooser" in final_url:
+            if signin_page == "accountchooser":
                 self.logger.error("Cookie验证失败: 被重定向到账户选择页面")
                 return False
 
+            if not 200 <= status < 300:
+                self.logger.error(f"Cookie验证失败: 验证页面返回状态码 {status}")
+                return False
+
+            # 检查页面脚本是否会跳转到登录页面（脚本中的URL可能转义了斜杠）
+            signin_page = match_google_signin(body.replace('\\/', '/'))
+            if signin_page is not None:
+                self.logger.error(f"Cookie验证失败: 页面将跳转到登录页面 ({signin_page})")
+                return False
+
             # 如果没有跳转到登录页面，就算成功
             self.logger.info("Cookie验证成功")
             return True
 
         except TimeoutError:
-            self.logger.error("Cookie验证失败: 页面加载超时")
+            self.logger.error("Cookie验证失败: 请求超时")
             return False
 
         except PlaywrightError as e:
@@ -68,14 +82,6 @@ class CookieValidator:
             self.logger.error(f"Cookie验证失败: {e}")
             return False
 
-        finally:
-            # 关闭验证标签页
-            if validation_page:
-                try:
-                    validation_page.close()
-                except Exception:
-                    pass  # 忽略关闭错误
-
     def shutdown_instance_on_cookie_failure(self):
         """
         因Cookie失效而关闭实例
@@ -1,6 +1,8 @@
 import os
+import re
 import signal
 import time
+from concurrent.futures import ThreadPoolExecutor
 from playwright.sync_api import TimeoutError, Error as PlaywrightError, expect
 from utils.logger import setup_logging
 from utils.cookie_manager import CookieManager
@@ -9,7 +11,24 @@ from browser.cookie_validator import CookieValidator
 from camoufox.sync_api import Camoufox
 from utils.paths import logs_dir
 from utils.common import parse_headless_mode, ensure_dir
-from utils.url_helper import extract_url_path, mask_url_for_logging, mask_path_for_logging
+from utils.url_helper import extract_url_path, mask_url_for_logging, mask_path_for_logging, match_google_signin
+
+# 登录按钮名称（中文/英文界面），与字符串 name 一样按不区分大小写的子串匹配
+_LOGIN_BUTTON_NAME_RE = re.compile(r'登录|Login', re.IGNORECASE)
+
+# 诊断文件（截图/HTML）的后台写入线程池，避免磁盘写入阻塞失败路径
+# 子进程退出前会等待线程池中的写入任务完成
+_DIAG_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='diag')
+
+
+def _write_diag_file(path, data, logger, success_message):
+    """在后台线程中将诊断数据写入磁盘"""
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info(f"{success_message}: {path}")
+    except Exception as e:
+        logger.error(f"写入诊断文件 {path} 时出错: {e}")
 
 
 def run_browser_instance(config, shutdown_event=None):
@@ -39,26 +58,22 @@ def run_browser_instance(config, shutdown_event=None):
     proxy = config.get('proxy')
     headless_setting = config.get('headless', 'virtual')
 
-    # 使用CookieManager加载Cookie
+    # 使用CookieManager加载Cookie（只在重试循环外加载一次）
     cookie_manager = CookieManager(logger)
-    all_cookies = []
 
     try:
         # 直接使用CookieSource对象加载Cookie
         cookies = cookie_manager.load_cookies(cookie_source)
-        all_cookies.extend(cookies)
 
     except Exception as e:
         logger.error(f"从Cookie来源加载时出错: {e}")
         return
 
     # 3. 检查是否有任何Cookie可用
-    if not all_cookies:
+    if not cookies:
         logger.error("错误: 没有可用的Cookie（既没有有效的JSON文件，也没有环境变量）")
         return
 
-    cookies = all_cookies
-
     headless_mode = parse_headless_mode(headless_setting)
     launch_options = {"headless": headless_mode}
     # launch_options["block_images"] = True  # 禁用图片加载
@@ -70,11 +85,20 @@ def run_browser_instance(config, shutdown_event=None):
     screenshot_dir = logs_dir()
     ensure_dir(screenshot_dir)
 
+    def diag_path(kind, ext="png"):
+        """返回诊断文件（截图/HTML）的路径，统一命名规则"""
+        return os.path.join(screenshot_dir, f"{kind}_{diagnostic_tag}.{ext}")
+
     # 重启控制变量
     max_retries = int(os.getenv("MAX_RESTART_RETRIES", "5"))
     retry_count = 0
     base_delay = 3
 
+    # 预先计算不随重试变化的值
+    # 提取路径部分进行匹配（允许域名重定向）
+    expected_path = extract_url_path(expected_url).split('?', 1)[0]
+    masked_expected_url = mask_url_for_logging(expected_url)
+
     while True:
         # 检查是否收到全局关闭信号
         if shutdown_event and shutdown_event.is_set():
@@ -82,10 +106,11 @@ def run_browser_instance(config, shutdown_event=None):
             return
 
         try:
-            with Camoufox(**launch_options) as browser:
-                context = browser.new_context()
+            # context 和 page 也作为上下文管理器使用，确保重试前页面和上下文已被关闭，避免残留进程
+            with Camoufox(**launch_options) as browser, \
+                    browser.new_context() as context, \
+                    context.new_page() as page:
                 context.add_cookies(cookies)
-                page = context.new_page()
 
                 # 创建Cookie验证器
                 cookie_validator = CookieValidator(page, context, logger)
@@ -96,9 +121,10 @@ def run_browser_instance(config, shutdown_event=None):
                 
                 response = None
                 try:
-                    logger.info(f"正在导航到: {mask_url_for_logging(expected_url)} (超时设置为 90 秒)")
+                    logger.info(f"正在导航到: {masked_expected_url} (超时设置为 30 秒)")
                     # page.goto() 会返回一个 response 对象，我们可以用它来获取状态码等信息
-                    response = page.goto(expected_url, wait_until='domcontentloaded', timeout=90000)
+                    # 只等待主框架提交 (commit)，页面就绪由后续的 spinner 等待来判断
+                    response = page.goto(expected_url, wait_until='commit', timeout=30000)
                     
                     # 检查HTTP响应状态码
                     if response:
@@ -106,27 +132,29 @@ def run_browser_instance(config, shutdown_event=None):
                         if not response.ok: # response.ok 检查状态码是否在 200-299 范围内
                             logger.warning(f"警告：页面加载成功，但HTTP状态码表示错误: {response.status}")
                             # 即使状态码错误，也保存快照以供分析
-                            page.screenshot(path=os.path.join(screenshot_dir, f"WARN_http_status_{response.status}_{diagnostic_tag}.png"))
+                            page.screenshot(path=diag_path(f"WARN_http_status_{response.status}"))
                     else:
                         # 对于非http/https的导航（如 about:blank），response可能为None
                         logger.warning("page.goto 未返回响应对象，可能是一个非HTTP导航")
 
                 except TimeoutError:
                     # 这是最常见的错误：超时
-                    logger.error(f"导航到 {mask_url_for_logging(expected_url)} 超时 (超过90秒)")
+                    logger.error(f"导航到 {masked_expected_url} 超时 (超过30秒)")
                     logger.error("可能原因：网络连接缓慢、目标网站服务器无响应、代理问题、或页面资源被阻塞")
                     # 尝试保存诊断信息
                     try:
                         # 截图对于看到页面卡在什么状态非常有帮助（例如，空白页、加载中、Chrome错误页）
-                        screenshot_path = os.path.join(screenshot_dir, f"FAIL_timeout_{diagnostic_tag}.png")
-                        page.screenshot(path=screenshot_path, full_page=True)
-                        logger.info(f"已截取超时时的屏幕快照: {screenshot_path}")
+                        # 同步获取数据，文件写入交给后台线程
+                        screenshot_path = diag_path("FAIL_timeout")
+                        screenshot_bytes = page.screenshot(full_page=True)
+                        _DIAG_POOL.submit(_write_diag_file, screenshot_path, screenshot_bytes, logger, "已截取超时时的屏幕快照")
                         
                         # 保存HTML可以帮助分析DOM结构，即使在无头模式下也很有用
-                        html_path = os.path.join(screenshot_dir, f"FAIL_timeout_{diagnostic_tag}.html")
-                        with open(html_path, 'w', encoding='utf-8') as f:
-                            f.write(page.content())
-                        logger.info(f"已保存超时时的页面HTML: {html_path}")
+                        # 只保存 body 的 outerHTML，避免序列化整个文档（含内联脚本）
+                        html_path = diag_path("FAIL_timeout", "html")
+                        body_html = page.evaluate('document.body ? document.body.outerHTML : ""')
+                        html_bytes = body_html.encode('utf-8')
+                        _DIAG_POOL.submit(_write_diag_file, html_path, html_bytes, logger, "已保存超时时的页面HTML")
                     except Exception as diag_e:
                         logger.error(f"在尝试进行超时诊断（截图/保存HTML）时发生额外错误: {diag_e}")
                     return # 超时后，后续操作无意义，直接终止
@@ -134,7 +162,7 @@ def run_browser_instance(config, shutdown_event=None):
                 except PlaywrightError as e:
                     # 捕获其他Playwright相关的网络错误，例如DNS解析失败、连接被拒绝等
                     error_message = str(e)
-                    logger.error(f"导航到 {mask_url_for_logging(expected_url)} 时发生 Playwright 网络错误")
+                    logger.error(f"导航到 {masked_expected_url} 时发生 Playwright 网络错误")
                     logger.error(f"错误详情: {error_message}")
                     
                     # Playwright的错误信息通常很具体，例如 "net::ERR_CONNECTION_REFUSED"
@@ -147,9 +175,9 @@ def run_browser_instance(config, shutdown_event=None):
                     
                     # 同样，尝试截图，尽管此时页面可能完全无法访问
                     try:
-                        screenshot_path = os.path.join(screenshot_dir, f"FAIL_network_error_{diagnostic_tag}.png")
-                        page.screenshot(path=screenshot_path)
-                        logger.info(f"已截取网络错误时的屏幕快照: {screenshot_path}")
+                        screenshot_path = diag_path("FAIL_network_error")
+                        screenshot_bytes = page.screenshot()
+                        _DIAG_POOL.submit(_write_diag_file, screenshot_path, screenshot_bytes, logger, "已截取网络错误时的屏幕快照")
                     except Exception as diag_e:
                         logger.error(f"在尝试进行网络错误诊断（截图）时发生额外错误: {diag_e}")
                     return # 网络错误，终止
@@ -157,19 +185,22 @@ def run_browser_instance(config, shutdown_event=None):
                 # --- 如果导航没有抛出异常，继续执行后续逻辑 ---
                 
                 logger.info("页面初步加载完成，正在检查并处理初始弹窗...")
-                page.wait_for_timeout(2000)
+                # 导航只等待到 commit；等 DOM 解析完成后再读取URL，
+                # 以便页面脚本发起的登录页重定向能反映在最终URL中
+                try:
+                    page.wait_for_load_state('domcontentloaded', timeout=30000)
+                except TimeoutError:
+                    logger.warning("等待页面 DOM 加载超时，将按当前URL继续检查")
                 
                 final_url = page.url
                 logger.info(f"导航完成。最终URL为: {mask_url_for_logging(final_url)}")
 
-                # ... 你原有的URL检查逻辑保持不变 ...
-                if "accounts.google.com/v3/signin/identifier" in final_url:
+                signin_page = match_google_signin(final_url)
+                if signin_page == "identifier":
                     logger.error("检测到Google登录页面（需要输入邮箱）。Cookie已完全失效")
-                    page.screenshot(path=os.path.join(screenshot_dir, f"FAIL_identifier_page_{diagnostic_tag}.png"))
+                    page.screenshot(path=diag_path("FAIL_identifier_page"))
                     return
 
-                # 提取路径部分进行匹配（允许域名重定向）
-                expected_path = extract_url_path(expected_url).split('?')[0]
                 final_path = extract_url_path(final_url)
 
                 if expected_path and expected_path in final_path:
@@ -188,7 +219,7 @@ def run_browser_instance(config, shutdown_event=None):
                         logger.info("加载指示器已消失。页面已完成异步加载")
                     except TimeoutError:
                         logger.error("页面加载指示器在30秒内未消失。页面可能已卡住")
-                        page.screenshot(path=os.path.join(screenshot_dir, f"FAIL_spinner_stuck_{diagnostic_tag}.png"))
+                        page.screenshot(path=diag_path("FAIL_spinner_stuck"))
                         raise KeepAliveError("页面加载指示器超时")
 
                     # --- 现在我们可以安全地检查错误消息 ---
@@ -199,10 +230,10 @@ def run_browser_instance(config, shutdown_event=None):
                     # 这里我们只需要很短的超时时间，因为页面应该是稳定的。
                     if auth_error_locator.is_visible(timeout=2000):
                         logger.error(f"检测到认证失败的错误横幅: '{auth_error_text}'. Cookie已过期或无效")
-                        screenshot_path = os.path.join(screenshot_dir, f"FAIL_auth_error_banner_{diagnostic_tag}.png")
+                        screenshot_path = diag_path("FAIL_auth_error_banner")
                         page.screenshot(path=screenshot_path)
                         
-                        # html_path = os.path.join(screenshot_dir, f"FAIL_auth_error_banner_{diagnostic_tag}.html")
+                        # html_path = diag_path("FAIL_auth_error_banner", "html")
                         # with open(html_path, 'w', encoding='utf-8') as f:
                         #     f.write(page.content())
                         # logger.info(f"已保存包含错误信息的页面HTML: {html_path}")
@@ -210,28 +241,28 @@ def run_browser_instance(config, shutdown_event=None):
 
                     # --- 如果没有错误，进行最终确认（作为后备方案） ---
                     logger.info("未检测到认证错误横幅。进行最终确认")
-                    login_button_cn = page.get_by_role('button', name='登录')
-                    login_button_en = page.get_by_role('button', name='Login')
+                    # 一次查询同时匹配中英文登录按钮
+                    login_button = page.get_by_role('button', name=_LOGIN_BUTTON_NAME_RE).first
                     
-                    if login_button_cn.is_visible(timeout=1000) or login_button_en.is_visible(timeout=1000):
+                    if login_button.is_visible(timeout=1000):
                         logger.error("页面上仍显示'登录'按钮。Cookie无效")
-                        page.screenshot(path=os.path.join(screenshot_dir, f"FAIL_login_button_visible_{diagnostic_tag}.png"))
+                        page.screenshot(path=diag_path("FAIL_login_button_visible"))
                         return
 
                     # --- 如果所有检查都通过，我们假设成功 ---
                     logger.info("所有验证通过，确认已成功登录")
 
                     handle_successful_navigation(page, logger, diagnostic_tag, shutdown_event, cookie_validator)
-                elif "accounts.google.com/v3/signin/accountchooser" in final_url:
+                elif signin_page == "accountchooser":
                     logger.warning("检测到Google账户选择页面。登录失败或Cookie已过期")
-                    page.screenshot(path=os.path.join(screenshot_dir, f"FAIL_chooser_click_failed_{diagnostic_tag}.png"))
+                    page.screenshot(path=diag_path("FAIL_chooser_click_failed"))
                     return
                 else:
                     logger.error(f"导航到了意外的URL")
                     logger.error(f"  预期路径: {mask_path_for_logging(expected_path)}")
                     logger.error(f"  最终路径: {mask_path_for_logging(final_path)}")
                     logger.error(f"  最终URL: {mask_url_for_logging(final_url)}")
-                    page.screenshot(path=os.path.join(screenshot_dir, f"FAIL_unexpected_url_{diagnostic_tag}.png"))
+                    page.screenshot(path=diag_path("FAIL_unexpected_url"))
                     return
 
                 # 如果运行到这里且没有异常，表示实例正常结束（例如收到关闭信号）
@@ -248,7 +279,13 @@ def run_browser_instance(config, shutdown_event=None):
             # 指数退避：3秒、6秒、12秒、24秒...最长60秒
             delay = min(base_delay * (2 ** (retry_count - 1)), 60)
             logger.error(f"浏览器实例出现错误 (重试 {retry_count}/{max_retries})，将在 {delay} 秒后重启浏览器实例: {e}")
-            time.sleep(delay)
+            # 退避等待期间收到关闭信号则立即退出
+            if shutdown_event:
+                if shutdown_event.wait(timeout=delay):
+                    logger.info("检测到全局关闭事件，浏览器实例不再启动，准备退出")
+                    return
+            else:
+                time.sleep(delay)
             continue
         except KeyboardInterrupt:
             logger.info(f"用户中断，正在关闭...")
@@ -11,37 +11,30 @@ class KeepAliveError(Exception):
 def handle_popup_dialog(page: Page, logger=None):
     """
     检查并处理弹窗。
-    交替点击 Got it 和 Continue to the app 按钮直到没有弹窗。
+    每轮通过一次定位查询找出 Got it / Continue to the app 按钮并点击第一个，直到没有弹窗。
     """
     logger.info("开始处理弹窗...")
     
-    # 定义需要查找的按钮列表
+    # 定义需要查找的按钮列表，合并为一个选择器，每轮只需一次查询
     button_names = ["Got it", "Continue to the app"]
+    button_locator = page.locator(", ".join(f'button:visible:has-text("{name}")' for name in button_names))
     max_iterations = 10  # 最多尝试10轮，防止死循环
     total_clicks = 0
     
     try:
         for iteration in range(max_iterations):
-            clicked_in_round = False
-            
             # 等待页面稳定
-            time.sleep(1)
-            
-            # 每轮交替尝试点击所有按钮
-            for button_name in button_names:
-                try:
-                    button_locator = page.locator(f'button:visible:has-text("{button_name}")')
-                    if button_locator.count() > 0 and button_locator.first.is_visible():
-                        # logger.info(f"检测到弹窗: 点击 '{button_name}'")
-                        button_locator.first.click(force=True, timeout=2000)
-                        total_clicks += 1
-                        clicked_in_round = True
-                        time.sleep(1)
-                except:
-                    pass
+            page.wait_for_timeout(500)
             
-            if not clicked_in_round:
+            if button_locator.count() == 0:
                 break
+
+            # 点击后弹窗可能关闭、剩余按钮的位置随之变化，因此每轮只点击当前的第一个按钮
+            try:
+                button_locator.first.click(force=True, timeout=2000)
+                total_clicks += 1
+            except:
+                pass
         
         if total_clicks > 0:
             logger.info(f"弹窗处理完成, 共点击 {total_clicks} 次")
@@ -77,8 +70,13 @@ def handle_successful_navigation(page: Page, logger, cookie_file_config, shutdow
 
     logger.info("实例将保持运行状态。每10秒点击一次页面以保持活动")
 
-    # 等待页面加载和渲染
-    time.sleep(15)
+    # 等待页面加载和渲染（期间收到关闭信号则立即退出）
+    if shutdown_event:
+        if shutdown_event.wait(timeout=15):
+            logger.info("收到关闭信号，正在优雅退出保持活动循环...")
+            return
+    else:
+        time.sleep(15)
 
     # 记录初始WS状态
     last_ws_status = get_ws_status(page, logger)
@@ -125,12 +123,13 @@ def handle_successful_navigation(page: Page, logger, cookie_file_config, shutdow
 
                 click_counter = 0  # 重置计数器
 
-            # 使用可中断的睡眠，每秒检查一次关闭信号
-            for _ in range(10):  # 10秒 = 10次1秒检查
-                if shutdown_event and shutdown_event.is_set():
+            # 阻塞等待10秒，期间收到关闭信号会立即返回，无需逐秒轮询
+            if shutdown_event:
+                if shutdown_event.wait(timeout=10):
                     logger.info("收到关闭信号，正在优雅退出保持活动循环...")
                     return
-                time.sleep(1)
+            else:
+                time.sleep(10)
 
         except Exception as e:
             logger.error(f"在保持活动循环中出错: {e}")
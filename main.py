@@ -1,9 +1,12 @@
+import json
 import os
 import threading
 import multiprocessing
+import select
 import signal
 import sys
 import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 # 加载 .env 文件（仅在非 Docker 环境且文件存在时）
 def load_env_file():
@@ -20,41 +23,159 @@ def load_env_file():
 
 load_env_file()
 
-from browser.instance import run_browser_instance
 from utils.logger import setup_logging
 from utils.paths import cookies_dir, logs_dir
 from utils.cookie_manager import CookieManager
 from utils.common import clean_env_value, ensure_dir
+from utils.shutdown import ShutdownSignal
 
 # 全局变量
 app_running = False
-flask_app = None
-# 使用 multiprocessing.Event 实现跨进程通信
-shutdown_event = multiprocessing.Event()
+# 目录和日志文件路径只计算一次
+_LOGS_DIR = logs_dir()
+_COOKIES_DIR = cookies_dir()
+_APP_LOG = str(_LOGS_DIR / 'app.log')
+# 使用基于管道的 ShutdownSignal 实现跨进程通信，其文件描述符可与 pidfd 一起被 epoll 监听
+shutdown_event = ShutdownSignal()
 
 
 class ProcessManager:
     """进程管理器，负责跟踪和管理浏览器进程"""
 
-    def __init__(self):
-        self.processes = {}  # {process_id: process_info}
+    def __init__(self, shutdown_event=None):
+        self.processes = {}  # {pid: process_info}
+        self._pending = []  # 尚未获得PID的进程信息，获得PID后移入 self.processes
+        self._heartbeat = None  # 定期状态日志定时器
+        self._heartbeat_generation = 0  # 每次启动/取消定时器时递增，用于识别过期的回调
         self.lock = threading.RLock()
-        ensure_dir(logs_dir())
-        self.logger = setup_logging(str(logs_dir() / 'app.log'), prefix="manager")
+        ensure_dir(_LOGS_DIR)
+        self.logger = setup_logging(_APP_LOG, prefix="manager")
+
+        # 使用 pidfd + epoll 等待子进程退出（Linux >= 5.3, Python >= 3.9）
+        # 不支持时 self._poller 为 None，回退到轮询 is_alive()
+        self._shutdown_event = shutdown_event
+        self._poller = None
+        self._pid_to_fd = {}  # {pid: pidfd}
+        self._fd_to_pid = {}  # {pidfd: pid}
+        self._unwatched = set()  # 未能创建 pidfd 的进程PID，需轮询 is_alive()
+        if hasattr(os, 'pidfd_open') and hasattr(select, 'epoll'):
+            try:
+                self._poller = select.epoll()
+            except OSError as e:
+                self.logger.warning(f"无法创建 epoll，回退到轮询模式: {e}")
+
+        # 关闭信号的文件描述符也注册到 epoll，收到关闭请求时唤醒等待
+        # 使用 EPOLLONESHOT，信号设置后只唤醒一次，避免持续可读导致空转
+        if self._poller is not None and shutdown_event is not None:
+            self._poller.register(shutdown_event.fileno(), select.EPOLLIN | select.EPOLLONESHOT)
+
+    def _watch_pid(self, pid):
+        """为子进程创建 pidfd 并注册到 epoll，进程退出时 pidfd 变为可读"""
+        if self._poller is None or pid in self._pid_to_fd:
+            return
+        try:
+            fd = os.pidfd_open(pid, 0)
+        except OSError as e:
+            # ENOSYS（内核不支持）、EPERM（seccomp 限制）或进程已不存在，改为轮询该进程
+            self.logger.warning(f"无法为进程 {pid} 创建 pidfd，将轮询其状态: {e}")
+            self._unwatched.add(pid)
+            return
+        self._poller.register(fd, select.EPOLLIN)
+        self._pid_to_fd[pid] = fd
+        self._fd_to_pid[fd] = pid
+
+    def _unwatch_pid(self, pid):
+        """注销并关闭子进程的 pidfd"""
+        self._unwatched.discard(pid)
+        fd = self._pid_to_fd.pop(pid, None)
+        if fd is None:
+            return
+        self._fd_to_pid.pop(fd, None)
+        try:
+            self._poller.unregister(fd)
+        except (OSError, ValueError):
+            pass
+        os.close(fd)
+
+    def wait_for_exit(self, timeout, pids=None):
+        """
+        阻塞等待任意子进程退出或收到关闭信号，最多等待 timeout 秒
+
+        Args:
+            timeout: 最长等待秒数
+            pids: （可选）需要轮询检查的进程PID；为 None 时检查所有子进程。
+                调用者尚未移除的已退出进程应排除在外，否则轮询会立即返回
+
+        Returns:
+            set: 在等待期间检测到已退出的进程PID集合，超时则为空集合
+        """
+        if self._poller is None:
+            return self._poll_for_exit(timeout, pids)
+
+        deadline = time.time() + timeout
+        while True:
+            # 存在未注册 pidfd 的进程时，缩短 epoll 超时以便定期检查它们
+            unwatched = self._unwatched if pids is None else self._unwatched.intersection(pids)
+            remaining = max(deadline - time.time(), 0)
+            poll_timeout = min(0.5, remaining) if unwatched else remaining
+            try:
+                events = self._poller.poll(poll_timeout)
+            except OSError:
+                return set()
+
+            exited = set()
+            with self.lock:
+                for fd, _ in events:
+                    pid = self._fd_to_pid.get(fd)
+                    if pid is not None:
+                        exited.add(pid)
+                        # 已退出进程的 pidfd 会一直保持可读，注销后避免重复唤醒
+                        self._unwatch_pid(pid)
+                    # 其他事件来自关闭信号，只需唤醒调用者
+            exited |= self._find_exited(list(unwatched))
+
+            if events or exited or time.time() >= deadline:
+                return exited
+
+    def _find_exited(self, pids):
+        """返回给定PID中已退出（或无法访问）的进程PID集合"""
+        exited = set()
+        for pid in pids:
+            info = self.processes.get(pid)
+            process = info['process'] if info else None
+            try:
+                if not (process and process.is_alive()):
+                    exited.add(pid)
+            except (ValueError, ProcessLookupError, AttributeError):
+                exited.add(pid)
+        return exited
+
+    def _poll_for_exit(self, timeout, pids=None):
+        """不支持 pidfd 时的回退实现：定期检查 is_alive()"""
+        # 等待开始时尚未关闭，则在关闭信号设置时立即返回；
+        # 已经关闭时（例如 terminate_all 中）信号一直可读，只能按间隔休眠
+        shutdown_event = self._shutdown_event
+        if shutdown_event is not None and shutdown_event.is_set():
+            shutdown_event = None
+
+        deadline = time.time() + timeout
+        while True:
+            candidates = pids if pids is not None else [pid for pid, _ in self._snapshot()]
+            exited = self._find_exited(candidates)
+            remaining = deadline - time.time()
+            if exited or remaining <= 0:
+                return exited
+            if shutdown_event is not None:
+                if shutdown_event.wait(timeout=min(0.5, remaining)):
+                    return set()
+            else:
+                time.sleep(min(0.5, remaining))
 
     def add_process(self, process, config=None):
         """添加进程到管理器"""
         with self.lock:
             pid = process.pid if process and hasattr(process, 'pid') else None
 
-            # 允许添加PID为None的进程（可能还在启动中），但会记录这个情况
-            if pid is None:
-                # 使用临时ID作为key，等获得真实PID后再更新
-                temp_id = f"temp_{len(self.processes)}"
-                self.logger.warning(f"进程PID暂时为None，使用临时ID {temp_id}")
-            else:
-                temp_id = pid
-
             process_info = {
                 'process': process,
                 'config': config,
@@ -62,127 +183,230 @@ class ProcessManager:
                 'is_alive': True,
                 'start_time': time.time()
             }
-            self.processes[temp_id] = process_info
 
-    def update_temp_pids(self):
-        """更新临时PID为真实PID"""
+            # 允许添加PID为None的进程（可能还在启动中），但会记录这个情况
+            if pid is None:
+                # 暂存到待定列表，等获得真实PID后再加入进程表
+                self._pending.append(process_info)
+                self.logger.warning("进程PID暂时为None，等待获得PID后再加入进程表")
+            else:
+                self.processes[pid] = process_info
+                self._watch_pid(pid)
+
+    def update_pending_pids(self):
+        """将已获得真实PID的待定进程移入进程表"""
+        # 绝大多数情况下没有待定进程，无需加锁
+        if not self._pending:
+            return
+
         with self.lock:
-            temp_ids = [k for k in self.processes.keys() if isinstance(k, str) and k.startswith("temp_")]
-            for temp_id in temp_ids:
-                process_info = self.processes[temp_id]
+            still_pending = []
+            for process_info in self._pending:
                 process = process_info['process']
 
                 if process and hasattr(process, 'pid') and process.pid is not None:
-                    # 更新为真实PID
                     self.processes[process.pid] = process_info
-                    del self.processes[temp_id]
                     process_info['pid'] = process.pid
+                    self._watch_pid(process.pid)
+                else:
+                    still_pending.append(process_info)
+            self._pending = still_pending
 
     def remove_process(self, pid):
         """从管理器中移除进程"""
         with self.lock:
             if pid in self.processes:
                 del self.processes[pid]
+            self._unwatch_pid(pid)
 
-    def get_alive_processes(self):
-        """获取所有存活进程"""
+    def reap_processes(self, pids):
+        """回收已退出的进程并从管理器中移除，只处理给定的PID"""
         with self.lock:
-            # 首先尝试更新临时PID
-            self.update_temp_pids()
-
-            alive = []
-            dead_pids = []
-
-            for pid, info in self.processes.items():
-                process = info['process']
-                try:
-                    # 检查进程是否真实存在且是子进程
-                    if process and hasattr(process, 'is_alive') and process.is_alive():
-                        alive.append(process)
-                    else:
-                        dead_pids.append(pid)
-                except (ValueError, ProcessLookupError) as e:
-                    # 进程已经不存在
-                    dead_pids.append(pid)
-                    self.logger.warning(f"进程 {pid} 检查时出错: {e}")
-
-            # 清理死进程记录
-            for pid in dead_pids:
+            for pid in pids:
+                info = self.processes.get(pid)
+                if info and info['process']:
+                    try:
+                        info['process'].join(0)
+                    except (ValueError, AssertionError):
+                        pass
                 self.remove_process(pid)
 
-            return alive
+    def wait_until_empty_or_shutdown(self, shutdown_event=None, logger=None, log_interval=600):
+        """
+        阻塞直到所有子进程退出或收到关闭信号
+
+        只在子进程退出、收到关闭信号或看门狗超时时唤醒；实例数变化时记录日志，
+        无变化时由定时器每 log_interval 秒记录一次。
+
+        Returns:
+            bool: 所有子进程都已退出则为 True，因关闭信号返回则为 False
+        """
+        logger = logger or self.logger
+
+        current_count = len(self.get_alive_processes())
+        logger.info(f"当前运行的浏览器实例数: {current_count}")
+        self._start_heartbeat(logger, log_interval)
+
+        try:
+            while current_count > 0:
+                if shutdown_event is not None and shutdown_event.is_set():
+                    return False
+
+                exited = self.wait_for_exit(timeout=log_interval)
+                if exited:
+                    # 只回收已报告退出的进程，无需逐个检查所有子进程
+                    self.reap_processes(exited)
+                    new_count = self.get_count()
+                else:
+                    # 看门狗超时或收到关闭信号时完整检查一次，兜底未能注册 pidfd 的进程
+                    new_count = len(self.get_alive_processes())
+
+                if new_count != current_count:
+                    logger.info(f"当前运行的浏览器实例数: {new_count}")
+                    # 刚记录过日志，重新开始定期日志计时
+                    self._start_heartbeat(logger, log_interval)
+                current_count = new_count
+
+            return True
+        finally:
+            self._cancel_heartbeat()
+
+    def _start_heartbeat(self, logger, interval):
+        """（重新）启动定期状态日志定时器"""
+        with self.lock:
+            self._cancel_heartbeat()
+            self._heartbeat = threading.Timer(
+                interval, self._log_status, args=(logger, interval, self._heartbeat_generation)
+            )
+            self._heartbeat.daemon = True
+            self._heartbeat.start()
+
+    def _cancel_heartbeat(self):
+        """取消定期状态日志定时器"""
+        with self.lock:
+            self._heartbeat_generation += 1
+            if self._heartbeat is not None:
+                self._heartbeat.cancel()
+                self._heartbeat = None
 
-    def terminate_all(self, timeout=10):
-        """优雅地终止所有进程"""
+    def _log_status(self, logger, interval, generation):
+        """定时器回调：记录当前实例数并安排下一次记录"""
         with self.lock:
-            # logger = setup_logging(str(logs_dir() / 'app.log'), prefix="signal")
-            # 直接使用 self.logger，避免重复 setup_logging
+            # 回调触发时定时器可能已被取消或替换（cancel() 无法阻止已开始执行的回调），此时不再重新安排
+            if generation != self._heartbeat_generation:
+                return
+            logger.info(f"当前运行的浏览器实例数: {self.get_count()}")
+            self._start_heartbeat(logger, interval)
 
-            # 首先更新临时PID
-            self.update_temp_pids()
+    def _snapshot(self):
+        """
+        无锁获取进程表快照
 
-            if not self.processes:
-                self.logger.info("没有活跃的进程需要关闭")
-                return
+        只有写操作需要持有锁；CPython 中复制 dict 视图是原子操作，
+        读操作在快照上进行，不会与写操作争用锁。
+        """
+        return list(self.processes.items())
 
-            self.logger.info(f"开始关闭 {len(self.processes)} 个进程...")
+    def get_alive_processes(self):
+        """获取所有存活进程"""
+        # 首先尝试更新待定进程的PID
+        self.update_pending_pids()
+
+        alive = []
+        dead_pids = []
+
+        for pid, info in self._snapshot():
+            process = info['process']
+            try:
+                # 检查进程是否真实存在且是子进程
+                if process and hasattr(process, 'is_alive') and process.is_alive():
+                    alive.append(process)
+                else:
+                    dead_pids.append(pid)
+            except (ValueError, ProcessLookupError) as e:
+                # 进程已经不存在
+                dead_pids.append(pid)
+                self.logger.warning(f"进程 {pid} 检查时出错: {e}")
 
-            # 第一阶段：发送SIGTERM信号
-            active_pids = []
-            for pid, info in list(self.processes.items()):
-                process = info['process']
-                try:
-                    # 检查进程对象是否有效且进程存活
-                    if process and hasattr(process, 'is_alive') and process.is_alive() and pid is not None:
-                        self.logger.info(f"发送SIGTERM给进程 {pid} (运行时长: {time.time() - info['start_time']:.1f}秒)")
-                        process.terminate()
-                        active_pids.append(pid)
-                    else:
-                        self.logger.info(f"进程 {pid if pid is not None else 'None'} 已经停止或无效")
-                except (ValueError, ProcessLookupError, AttributeError) as e:
-                    self.logger.warning(f"进程 {pid if pid is not None else 'None'} 访问出错: {e}")
-
-            if not active_pids:
-                self.logger.info("所有进程已经停止")
-                return
+        # 清理死进程记录，一次加锁批量处理
+        if dead_pids:
+            with self.lock:
+                for pid in dead_pids:
+                    self.remove_process(pid)
 
-            # 第二阶段：等待进程退出
-            self.logger.info(f"等待 {len(active_pids)} 个进程优雅退出...")
-            start_wait = time.time()
-            while time.time() - start_wait < 5:  # 最多等待5秒
-                still_alive = []
-                for pid in active_pids:
-                    if pid in self.processes:
-                        process = self.processes[pid]['process']
-                        try:
-                            if process and hasattr(process, 'is_alive') and process.is_alive():
-                                still_alive.append(pid)
-                        except (ValueError, ProcessLookupError, AttributeError):
-                                pass
-                if not still_alive:
-                    self.logger.info("所有进程已优雅退出")
-                    return
-                time.sleep(0.5)
-            
-            self.logger.info(f"仍有 {len(still_alive)} 个进程在运行，准备强制关闭...")
-
-            # 第三阶段：强制杀死仍在运行的进程
-            for pid in active_pids:
-                if pid in self.processes and pid is not None:
-                    process = self.processes[pid]['process']
-                    try:
-                        if process and hasattr(process, 'is_alive') and process.is_alive():
-                            self.logger.warning(f"进程 {pid} 未响应SIGTERM，强制终止")
-                            process.kill()
-                    except (ValueError, ProcessLookupError, AttributeError) as e:
-                        self.logger.info(f"进程 {pid} 已终止: {e}")
+        return alive
 
-            self.logger.info("所有进程关闭完成")
+    def terminate_all(self, timeout=10):
+        """优雅地终止所有进程"""
+        # 首先更新待定进程的PID
+        self.update_pending_pids()
+
+        # 在快照上操作，不持有锁
+        targets = dict(self._snapshot())
+
+        if not targets:
+            self.logger.info("没有活跃的进程需要关闭")
+            return
+
+        self.logger.info(f"开始关闭 {len(targets)} 个进程...")
+
+        # 第一阶段：发送SIGTERM信号
+        active_pids = []
+        for pid, info in targets.items():
+            process = info['process']
+            try:
+                # 检查进程对象是否有效且进程存活
+                if process and hasattr(process, 'is_alive') and process.is_alive() and pid is not None:
+                    self.logger.info(f"发送SIGTERM给进程 {pid} (运行时长: {time.time() - info['start_time']:.1f}秒)")
+                    process.terminate()
+                    active_pids.append(pid)
+                else:
+                    self.logger.info(f"进程 {pid if pid is not None else 'None'} 已经停止或无效")
+            except (ValueError, ProcessLookupError, AttributeError) as e:
+                self.logger.warning(f"进程 {pid if pid is not None else 'None'} 访问出错: {e}")
+
+        if not active_pids:
+            self.logger.info("所有进程已经停止")
+            return
+
+        # 第二阶段：等待进程退出（阻塞在 wait_for_exit 上，进程退出时立即唤醒）
+        self.logger.info(f"等待 {len(active_pids)} 个进程优雅退出...")
+        deadline = time.time() + 5  # 最多等待5秒
+        while True:
+            still_alive = []
+            for pid in active_pids:
+                process = targets[pid]['process']
+                try:
+                    if process and hasattr(process, 'is_alive') and process.is_alive():
+                        still_alive.append(pid)
+                except (ValueError, ProcessLookupError, AttributeError):
+                        pass
+            if not still_alive:
+                self.logger.info("所有进程已优雅退出")
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            # 只等待仍在运行的进程；已退出的进程尚未从进程表移除，不能让它们立即唤醒等待
+            self.wait_for_exit(remaining, still_alive)
+        
+        self.logger.info(f"仍有 {len(still_alive)} 个进程在运行，准备强制关闭...")
+
+        # 第三阶段：强制杀死仍在运行的进程
+        for pid in still_alive:
+            process = targets[pid]['process']
+            try:
+                if process and hasattr(process, 'is_alive') and process.is_alive():
+                    self.logger.warning(f"进程 {pid} 未响应SIGTERM，强制终止")
+                    process.kill()
+            except (ValueError, ProcessLookupError, AttributeError) as e:
+                self.logger.info(f"进程 {pid} 已终止: {e}")
+
+        self.logger.info("所有进程关闭完成")
 
     def get_count(self):
         """获取管理的进程总数"""
-        with self.lock:
-            return len(self.processes)
+        return len(self.processes) + len(self._pending)
 
     def get_alive_count(self):
         """获取存活进程数"""
@@ -190,7 +414,7 @@ class ProcessManager:
 
 
 # 全局进程管理器
-process_manager = ProcessManager()
+process_manager = ProcessManager(shutdown_event)
 
 
 def load_instance_configurations(logger):
@@ -247,17 +471,23 @@ def start_browser_instances(run_mode="standalone"):
     """启动浏览器实例的核心逻辑"""
     global app_running, process_manager, shutdown_event
 
-    log_dir = logs_dir()
-    logger = setup_logging(str(log_dir / 'app.log'))
+    logger = setup_logging(_APP_LOG)
     logger.info("---------------------Camoufox 实例管理器开始启动---------------------")
     start_delay = int(os.getenv("INSTANCE_START_DELAY", "30"))
-    logger.info(f"运行模式: {run_mode}; 实例启动间隔: {start_delay} 秒")
+    # 每批同时启动的实例数，每批之间间隔 start_delay 秒
+    start_batch_size = max(int(os.getenv("INSTANCE_START_CONCURRENCY", "1")), 1)
+    logger.info(f"运行模式: {run_mode}; 实例启动间隔: {start_delay} 秒; 每批启动实例数: {start_batch_size}")
 
     global_settings, instance_profiles = load_instance_configurations(logger)
     if not instance_profiles:
         logger.error("错误: 环境变量中未找到任何实例配置")
         return
 
+    # 延迟导入：只有真正启动浏览器实例时才加载 Playwright/Camoufox
+    # 在 fork 子进程之前导入，子进程直接继承已加载的模块
+    from browser.instance import run_browser_instance
+
+    launched_count = 0
     for i, profile in enumerate(instance_profiles, 1):
         if not app_running:
             break
@@ -287,41 +517,20 @@ def start_browser_instances(run_mode="standalone"):
         # 传递 shutdown_event 给子进程
         process = multiprocessing.Process(target=run_browser_instance, args=(final_config, shutdown_event))
         process.start()
-        # 等待一小段时间让进程获得PID，然后再添加到管理器
-        time.sleep(0.1)
+        # start() 返回时PID已经可用，直接添加到管理器
         process_manager.add_process(process, final_config)
+        launched_count += 1
 
-        # 等待配置的时间，避免并发启动导致的高CPU占用
+        # 每启动一批后等待配置的时间，避免并发启动导致的高CPU占用
         # 即使是最后一个实例，也等待一段时间让其初始化，然后再进入主循环
-        time.sleep(start_delay)
+        # 收到关闭信号时立即结束等待
+        if launched_count % start_batch_size == 0 or i == len(instance_profiles):
+            shutdown_event.wait(timeout=start_delay)
 
-    # 等待所有进程
-    previous_count = None
-    last_log_time = 0
+    # 等待所有进程结束或收到关闭信号
     try:
-        while app_running:
-            alive_processes = process_manager.get_alive_processes()
-            current_count = len(alive_processes)
-
-            # 仅在数量变化或间隔一段时间后再记录，避免过于频繁的日志
-            now = time.time()
-            if current_count != previous_count or now - last_log_time >= 600:
-                logger.info(f"当前运行的浏览器实例数: {current_count}")
-                previous_count = current_count
-                last_log_time = now
-
-            if not alive_processes:
-                logger.info("所有浏览器进程已结束，主进程即将退出")
-                break
-
-            # 等待进程并清理死进程
-            for process in alive_processes:
-                try:
-                    process.join(timeout=1)
-                except:
-                    pass
-
-            time.sleep(1)
+        if process_manager.wait_until_empty_or_shutdown(shutdown_event, logger=logger):
+            logger.info("所有浏览器进程已结束，主进程即将退出")
     except KeyboardInterrupt:
         logger.info("捕获到键盘中断信号，等待信号处理器完成关闭...")
         # 不在这里关闭进程，让信号处理器统一处理
@@ -337,20 +546,60 @@ def run_standalone_mode():
 
     start_browser_instances(run_mode="standalone")
 
+class HealthRequestHandler(BaseHTTPRequestHandler):
+    """服务器模式下的 HTTP 请求处理器，提供主页和健康检查端点"""
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        # 与 GET 返回相同的状态码和响应头，但不发送响应体（供使用 HEAD 的探活请求）
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        path = self.path.split('?', 1)[0]
+        running_count = process_manager.get_alive_count()
+        total_count = process_manager.get_count()
+
+        if path == '/health':
+            # 健康检查端点
+            payload = {
+                'status': 'healthy',
+                'browser_instances': total_count,
+                'running_instances': running_count,
+                'message': f'Application is running with {running_count} active browser instances'
+            }
+        elif path == '/':
+            # 主页端点
+            payload = {
+                'status': 'running',
+                'browser_instances': total_count,
+                'running_instances': running_count,
+                'run_mode': 'server',
+                'message': 'Camoufox Browser Automation is running in server mode'
+            }
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 禁用默认的访问日志
+        pass
+
+
 def run_server_mode():
     """服务器模式"""
-    global app_running, flask_app
-
-    log_dir = logs_dir()
-    server_logger = setup_logging(str(log_dir / 'app.log'), prefix="server")
+    global app_running
 
-    # 动态导入 Flask（只在需要时）
-    try:
-        from flask import Flask, jsonify
-        flask_app = Flask(__name__)
-    except ImportError:
-        server_logger.error("错误: 服务器模式需要 Flask，请安装: pip install flask")
-        return
+    server_logger = setup_logging(_APP_LOG, prefix="server")
 
     app_running = True
 
@@ -358,42 +607,9 @@ def run_server_mode():
     browser_thread = threading.Thread(target=lambda: start_browser_instances(run_mode="server"), daemon=True)
     browser_thread.start()
 
-    # 定义路由
-    @flask_app.route('/health')
-    def health_check():
-        """健康检查端点"""
-        global process_manager
-        running_count = process_manager.get_alive_count()
-        total_count = process_manager.get_count()
-        return jsonify({
-            'status': 'healthy',
-            'browser_instances': total_count,
-            'running_instances': running_count,
-            'message': f'Application is running with {running_count} active browser instances'
-        })
-
-    @flask_app.route('/')
-    def index():
-        """主页端点"""
-        global process_manager
-        running_count = process_manager.get_alive_count()
-        total_count = process_manager.get_count()
-        return jsonify({
-            'status': 'running',
-            'browser_instances': total_count,
-            'running_instances': running_count,
-            'run_mode': 'server',
-            'message': 'Camoufox Browser Automation is running in server mode'
-        })
-
-    # 禁用 Flask 的默认日志
-    import logging
-    log = logging.getLogger('werkzeug')
-    log.setLevel(logging.ERROR)
-
-    # 启动 Flask 服务器
+    # 启动 HTTP 服务器
     try:
-        flask_app.run(host='0.0.0.0', port=7860, debug=False)
+        ThreadingHTTPServer(('0.0.0.0', 7860), HealthRequestHandler).serve_forever()
     except KeyboardInterrupt:
         server_logger.info("服务器正在关闭...")
 
@@ -402,7 +618,7 @@ def signal_handler(signum, frame):
     global app_running, process_manager, shutdown_event
 
     # 立即设置日志，确保能看到后续信息
-    logger = setup_logging(str(logs_dir() / 'app.log'), prefix="signal")
+    logger = setup_logging(_APP_LOG, prefix="signal")
     logger.info(f"接收到信号 {signum}，开始处理...")
 
     # 检查是否是主进程，防止子进程执行关闭逻辑
@@ -439,9 +655,17 @@ def signal_handler(signum, frame):
 
 def main():
     """主入口函数"""
+    # Linux 上显式使用 fork 启动子进程：子进程直接继承已导入的模块，
+    # 无需像 spawn/forkserver 那样在每个子进程中重新导入 main 模块
+    if sys.platform.startswith('linux'):
+        try:
+            multiprocessing.set_start_method('fork')
+        except RuntimeError:
+            pass  # 启动方式已被设置
+
     # 初始化必要的目录
-    ensure_dir(logs_dir())
-    ensure_dir(cookies_dir())
+    ensure_dir(_LOGS_DIR)
+    ensure_dir(_COOKIES_DIR)
 
     # 注册信号处理器 - 添加更多信号的捕获
     signal.signal(signal.SIGTERM, signal_handler)
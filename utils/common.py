@@ -16,7 +16,7 @@ def clean_env_value(value):
     Returns:
         str or None: 清理后的值，如果为空或None则返回None
     """
-    if value is None:
+    if not value:
         return None
     stripped = value.strip()
     return stripped or None
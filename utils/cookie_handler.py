@@ -1,3 +1,26 @@
+# KV 格式 Cookie 的默认属性
+_KV_COOKIE_DEFAULTS = {
+    'path': '/',
+    'expires': -1,      # 默认为会话 Cookie
+    'httpOnly': False,  # KV 格式无法确定 httpOnly 状态，默认为 False
+    'secure': True,     # 假设为安全 Cookie
+    'sameSite': 'Lax'   # 默认 SameSite 策略
+}
+
+
+# Cookie-Editor 导出格式中直接复制到 Playwright Cookie 的字段
+_EDITOR_COPY_KEYS = ('name', 'value', 'domain', 'path', 'httpOnly', 'secure')
+# Playwright 要求必须存在的字段
+_REQUIRED_KEYS = ('name', 'value', 'domain', 'path')
+# Cookie-Editor sameSite 值 -> Playwright sameSite 值
+_SAME_SITE_MAP = {
+    'no_restriction': 'None',
+    'lax': 'Lax',
+    'strict': 'Strict',
+    'unspecified': 'Lax'
+}
+
+
 def convert_cookie_editor_to_playwright(cookies_from_editor, logger=None):
     """
     将从 Cookie-Editor 插件导出的 Cookie 列表转换为 Playwright 兼容的格式。
@@ -5,32 +28,23 @@ def convert_cookie_editor_to_playwright(cookies_from_editor, logger=None):
     playwright_cookies = []
 
     for cookie in cookies_from_editor:
-        pw_cookie = {}
-        for key in ['name', 'value', 'domain', 'path', 'httpOnly', 'secure']:
-            if key in cookie:
-                pw_cookie[key] = cookie[key]
+        pw_cookie = {key: cookie[key] for key in _EDITOR_COPY_KEYS if key in cookie}
+
         if cookie.get('session', False):
             pw_cookie['expires'] = -1
         elif 'expirationDate' in cookie:
-            if cookie['expirationDate'] is not None:
-                pw_cookie['expires'] = int(cookie['expirationDate'])
-            else:
-                pw_cookie['expires'] = -1
+            expiration_date = cookie['expirationDate']
+            pw_cookie['expires'] = int(expiration_date) if expiration_date is not None else -1
 
         if 'sameSite' in cookie:
-            same_site_value = str(cookie['sameSite']).lower()
-            if same_site_value == 'no_restriction':
-                pw_cookie['sameSite'] = 'None'
-            elif same_site_value in ['lax', 'strict']:
-                pw_cookie['sameSite'] = same_site_value.capitalize()
-            elif same_site_value == 'unspecified':
-                pw_cookie['sameSite'] = 'Lax'
-
-        if all(key in pw_cookie for key in ['name', 'value', 'domain', 'path']):
+            same_site = _SAME_SITE_MAP.get(str(cookie['sameSite']).lower())
+            if same_site:
+                pw_cookie['sameSite'] = same_site
+
+        if all(key in pw_cookie for key in _REQUIRED_KEYS):
             playwright_cookies.append(pw_cookie)
-        else:
-            if logger:
-                logger.warning(f"跳过一个格式不完整的 Cookie: {cookie}")
+        elif logger:
+            logger.warning(f"跳过一个格式不完整的 Cookie: {cookie}")
 
     return playwright_cookies
 
@@ -74,22 +88,11 @@ def convert_kv_to_playwright(kv_string, default_domain=".google.com", logger=Non
                 logger.warning(f"跳过空名称的 Cookie: '{pair}'")
             continue
 
-        # 构造 Playwright 格式的 Cookie
-        pw_cookie = {
-            'name': name,
-            'value': value,
-            'domain': default_domain,
-            'path': '/',
-            'expires': -1,  # 默认为会话 Cookie
-            'httpOnly': False,  # KV 格式无法确定 httpOnly 状态，默认为 False
-            'secure': True,     # 假设为安全 Cookie
-            'sameSite': 'Lax'   # 默认 SameSite 策略
-        }
-
-        playwright_cookies.append(pw_cookie)
+        # 基于默认属性模板构造 Playwright 格式的 Cookie
+        playwright_cookies.append(dict(_KV_COOKIE_DEFAULTS, name=name, value=value, domain=default_domain))
 
-        if logger:
-            logger.debug(f"成功转换 Cookie: {name} -> domain={default_domain}")
+    if logger:
+        logger.debug(f"成功转换 {len(playwright_cookies)} 个 Cookie -> domain={default_domain}")
 
     return playwright_cookies
 
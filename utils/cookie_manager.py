@@ -4,13 +4,24 @@
 """
 
 import os
-import json
 from dataclasses import dataclass
 from typing import List, Dict, Optional
 from utils.paths import cookies_dir
 from utils.cookie_handler import auto_convert_to_playwright
 from utils.common import clean_env_value
 
+# 优先使用 orjson（C 实现，可直接解析 bytes），未安装时回退到标准库 json
+# 两者的解析错误都是 ValueError 的子类
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# Cookie 环境变量名前缀，如 USER_COOKIE_1、USER_COOKIE_2 ...
+_ENV_COOKIE_PREFIX = "USER_COOKIE_"
+
 @dataclass
 class CookieSource:
     """Cookie来源的统一表示"""
@@ -47,7 +58,12 @@ class CookieManager:
         try:
             cookie_path = cookies_dir()
             if os.path.isdir(cookie_path):
-                cookie_files = [f for f in os.listdir(cookie_path) if f.lower().endswith('.json')]
+                # scandir 的目录项自带文件类型信息，无需额外 stat 即可跳过子目录
+                with os.scandir(cookie_path) as entries:
+                    cookie_files = sorted(
+                        entry.name for entry in entries
+                        if entry.is_file() and entry.name.lower().endswith('.json')
+                    )
 
                 for cookie_file in cookie_files:
                     source = CookieSource(
@@ -70,17 +86,17 @@ class CookieManager:
                 self.logger.error(f"扫描 Cookie 目录时出错: {e}")
 
         # 2. 扫描USER_COOKIE环境变量
-        cookie_index = 1
+        # 一次遍历 os.environ 并按序号排序，序号不连续（如只设置了 _1 和 _3）时也不会遗漏
+        env_cookie_vars = sorted(
+            (name for name in os.environ
+             if name.startswith(_ENV_COOKIE_PREFIX) and name[len(_ENV_COOKIE_PREFIX):].isdecimal()),
+            key=lambda name: int(name[len(_ENV_COOKIE_PREFIX):])
+        )
         env_cookie_count = 0
 
-        while True:
-            env_var_name = f"USER_COOKIE_{cookie_index}"
-            env_value = clean_env_value(os.getenv(env_var_name))
-
-            if not env_value:
-                if cookie_index == 1 and self.logger:
-                    self.logger.info(f"未检测到任何 USER_COOKIE 环境变量")
-                break
+        for env_var_name in env_cookie_vars:
+            if not clean_env_value(os.environ[env_var_name]):
+                continue
 
             source = CookieSource(
                 type="env_var",
@@ -90,7 +106,9 @@ class CookieManager:
             sources.append(source)
 
             env_cookie_count += 1
-            cookie_index += 1
+
+        if env_cookie_count == 0 and self.logger:
+            self.logger.info(f"未检测到任何 USER_COOKIE 环境变量")
 
         if env_cookie_count > 0 and self.logger:
             self.logger.info(f"发现 {env_cookie_count} 个 Cookie 环境变量")
@@ -149,28 +167,29 @@ class CookieManager:
         if not os.path.exists(cookie_path):
             raise FileNotFoundError(f"Cookie 文件不存在: {cookie_path}")
 
-        with open(cookie_path, 'r', encoding='utf-8') as f:
-            file_content = f.read().strip()
+        with open(cookie_path, 'rb') as f:
+            file_content = f.read()
 
         # 尝试解析为 JSON
         try:
-            cookies_from_file = json.loads(file_content)
-            # JSON 解析成功，使用自动转换函数
-            return auto_convert_to_playwright(
-                cookies_from_file,
-                default_domain=".google.com",
-                logger=self.logger
-            )
-        except json.JSONDecodeError:
+            cookies_from_file = _json_loads(file_content)
+        except ValueError:
             # JSON 解析失败，当作 KV 格式处理
             if self.logger:
                 self.logger.info(f"文件 {filename} 不是有效的 JSON 格式，尝试作为 KV 格式解析")
             return auto_convert_to_playwright(
-                file_content,
+                file_content.decode('utf-8').strip(),
                 default_domain=".google.com",
                 logger=self.logger
             )
 
+        # JSON 解析成功，使用自动转换函数
+        return auto_convert_to_playwright(
+            cookies_from_file,
+            default_domain=".google.com",
+            logger=self.logger
+        )
+
     def _load_from_env(self, env_var_name: str) -> List[Dict]:
         """从环境变量加载 Cookie，自动识别 JSON 或 KV 格式"""
         env_value = clean_env_value(os.getenv(env_var_name))
@@ -180,14 +199,8 @@ class CookieManager:
 
         # 尝试解析为 JSON
         try:
-            cookies_from_env = json.loads(env_value)
-            # JSON 解析成功，使用自动转换函数
-            return auto_convert_to_playwright(
-                cookies_from_env,
-                default_domain=".google.com",
-                logger=self.logger
-            )
-        except json.JSONDecodeError:
+            cookies_from_env = _json_loads(env_value)
+        except ValueError:
             # JSON 解析失败，当作 KV 格式处理
             if self.logger:
                 self.logger.debug(f"环境变量 {env_var_name} 不是有效的 JSON 格式，作为 KV 格式解析")
@@ -195,4 +208,11 @@ class CookieManager:
                 env_value,
                 default_domain=".google.com",
                 logger=self.logger
-            )
\ No newline at end of file
+            )
+
+        # JSON 解析成功，使用自动转换函数
+        return auto_convert_to_playwright(
+            cookies_from_env,
+            default_domain=".google.com",
+            logger=self.logger
+        )
\ No newline at end of file
@@ -1,32 +1,71 @@
 import logging
-import datetime
 import os
+import threading
+import time
 
-def custom_timezone_converter(timestamp):
-    """
-    将时间戳转换为指定时区 (默认 UTC+8/Asia/Shanghai) 的 struct_time。
-    时区通过环境变量 TZ_OFFSET (小时数) 配置。
-    """
-    
-    # 尝试从环境变量获取偏移量，默认为 8 (北京时间)
+# 已配置的日志记录器缓存: {(log_file, prefix, level): logger}
+_cache = {}
+# 使用可重入锁：主线程持有锁时到达的信号，其处理函数也会调用 setup_logging
+_cache_lock = threading.RLock()
+
+# 同一日志文件的处理器只创建一次，所有记录器共享: {log_file: handler}
+_file_handlers = {}
+_console_handler = None
+
+
+def _reset_cache_lock():
+    # fork 时其他线程可能正持有锁，子进程中重新创建，避免死锁
+    global _cache_lock
+    _cache_lock = threading.RLock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_cache_lock)
+
+
+class _PrefixFilter(logging.Filter):
+    """为日志记录添加前缀字段，使多个记录器可以共享同一组处理器"""
+
+    def __init__(self, prefix):
+        super().__init__()
+        self.log_prefix = f'{prefix} - ' if prefix else ''
+
+    def filter(self, record):
+        record.log_prefix = self.log_prefix
+        return True
+
+
+def _load_tz_offset_seconds():
+    """读取环境变量 TZ_OFFSET (小时数)，默认为 8 (北京时间)，返回偏移秒数"""
     try:
         offset_hours = float(os.getenv('TZ_OFFSET', 8))
     except (ValueError, TypeError):
         offset_hours = 8
+    return offset_hours * 3600
 
-    # 创建时区对象
-    target_timezone = datetime.timezone(datetime.timedelta(hours=offset_hours))
-    
-    # 转换时间
-    dt_time = datetime.datetime.fromtimestamp(timestamp, target_timezone)
-    return dt_time.timetuple()
+
+# 时区偏移只在导入时计算一次（main.py 会在导入本模块前加载 .env）
+_TZ_OFFSET_SECONDS = _load_tz_offset_seconds()
+
+
+def custom_timezone_converter(timestamp):
+    """
+    将时间戳转换为指定时区 (默认 UTC+8/Asia/Shanghai) 的 struct_time。
+    时区通过环境变量 TZ_OFFSET (小时数) 配置。
+    """
+    # 直接对偏移后的时间戳调用 gmtime，避免每条日志都构造 datetime/timezone 对象
+    return time.gmtime(timestamp + _TZ_OFFSET_SECONDS)
 
 def setup_logging(log_file, prefix=None, level=logging.INFO):
     """
     配置日志记录器，使其输出到文件和控制台。
     支持一个可选的前缀，用于标识日志来源。
 
-    每次调用都会重新配置处理器，以适应多进程环境。
+    每个前缀使用独立的日志记录器；相同参数的重复调用直接返回已配置的记录器。
+    同一日志文件在每个进程中只打开一次，由所有记录器共享。
+
+    日志文件由所有进程以追加模式共同写入，因此不做轮转，也不缓冲：
+    浏览器子进程通过 SIGTERM 终止，缓冲中的日志会丢失。
     
     时间显示默认为 UTC+8 (北京时间)，可通过环境变量 TZ_OFFSET 修改。
 
@@ -34,35 +73,48 @@ def setup_logging(log_file, prefix=None, level=logging.INFO):
     :param prefix: (可选) 要添加到每条日志消息开头的字符串前缀。
     :param level: 日志级别。
     """
-    logger = logging.getLogger('my_app_logger') 
-    logger.setLevel(level)
-
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    key = (log_file, prefix, level)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            return cached
 
-    base_format = '%(asctime)s - %(process)d - %(levelname)s - %(message)s'
+        logger = logging.getLogger(f'my_app_logger.{prefix or "root"}')
+        logger.setLevel(level)
+        logger.propagate = False
 
-    if prefix:
-        log_format = f'%(asctime)s - %(process)d - %(levelname)s - {prefix} - %(message)s'
-    else:
-        log_format = base_format
+        # 只有尚未配置处理器时才添加
+        if not logger.handlers:
+            logger.addFilter(_PrefixFilter(prefix))
+            logger.addHandler(_get_file_handler(log_file))
+            logger.addHandler(_get_console_handler())
 
-    fh = logging.FileHandler(log_file)
-    fh.setLevel(level)
+        _cache[key] = logger
+        return logger
 
-    ch = logging.StreamHandler()
-    ch.setLevel(level)
 
-    formatter = logging.Formatter(log_format)
+def _create_formatter():
+    """创建统一的日志格式化器"""
+    formatter = logging.Formatter('%(asctime)s - %(process)d - %(levelname)s - %(log_prefix)s%(message)s')
     # 设置自定义的时间转换器
     formatter.converter = custom_timezone_converter
+    return formatter
 
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
 
-    logger.addHandler(fh)
-    logger.addHandler(ch)
-    
-    logger.propagate = False
-    
-    return logger
\ No newline at end of file
+def _get_file_handler(log_file):
+    """获取（必要时创建）指定日志文件的共享处理器"""
+    handler = _file_handlers.get(log_file)
+    if handler is None:
+        handler = logging.FileHandler(log_file, encoding='utf-8', delay=True)
+        handler.setFormatter(_create_formatter())
+        _file_handlers[log_file] = handler
+    return handler
+
+
+def _get_console_handler():
+    """获取（必要时创建）共享的控制台处理器"""
+    global _console_handler
+    if _console_handler is None:
+        _console_handler = logging.StreamHandler()
+        _console_handler.setFormatter(_create_formatter())
+    return _console_handler
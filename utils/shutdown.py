@@ -0,0 +1,51 @@
+"""
+跨进程关闭信号
+基于管道实现，替代 multiprocessing.Event
+"""
+
+import multiprocessing
+
+
+class ShutdownSignal:
+    """
+    跨进程关闭信号，提供与 multiprocessing.Event 相同的 set/is_set/wait 接口。
+
+    主进程向管道写入一个字节即可唤醒所有子进程；写入的数据不会被读取，
+    因此读端在 set() 之后一直保持可读状态。读端的文件描述符可以通过
+    fileno() 交给 select/epoll 监听。
+    """
+
+    def __init__(self):
+        self._reader, self._writer = multiprocessing.Pipe(duplex=False)
+        self._is_set = False
+
+    def __getstate__(self):
+        # 子进程只需要读端
+        return {'_reader': self._reader, '_writer': None, '_is_set': False}
+
+    def fileno(self):
+        """返回读端的文件描述符，set() 之后变为可读"""
+        return self._reader.fileno()
+
+    def set(self):
+        """设置关闭信号（只能在持有写端的主进程中调用）"""
+        if self._is_set:
+            return
+        self._writer.send_bytes(b'x')
+        self._is_set = True
+
+    def is_set(self):
+        """检查是否已设置关闭信号，不阻塞"""
+        return self._is_set or self._reader.poll(0)
+
+    def wait(self, timeout=None):
+        """
+        阻塞等待关闭信号
+
+        Args:
+            timeout: 最长等待秒数，None 表示一直等待
+
+        Returns:
+            bool: 在超时前收到关闭信号则为 True
+        """
+        return self._is_set or self._reader.poll(timeout)
@@ -4,9 +4,15 @@ URL处理辅助函数
 提供URL解析和路径提取功能，用于导航验证中的域名无关匹配。
 """
 
+import re
+from typing import Optional
 from urllib.parse import urlparse
 
 
+# Google 登录重定向页面：identifier（需要输入邮箱）或 accountchooser（账户选择）
+_SIGNIN_RE = re.compile(r'accounts\.google\.com/v3/signin/(identifier|accountchooser)')
+
+
 def extract_url_path(url: str) -> str:
     """
     提取URL的路径和查询参数部分，忽略协议和域名差异
@@ -150,3 +156,27 @@ def mask_url_for_logging(url: str) -> str:
     except Exception:
         # 如果URL解析失败，返回原始URL
         return url
+
+
+def match_google_signin(url: str) -> Optional[str]:
+    """
+    检查URL是否为Google登录重定向页面
+
+    Args:
+        url: 完整URL字符串
+
+    Returns:
+        'identifier' 或 'accountchooser'；如果不是登录页面，返回None
+
+    Examples:
+        >>> match_google_signin("https://accounts.google.com/v3/signin/identifier?continue=x")
+        'identifier'
+
+        >>> match_google_signin("https://aistudio.google.com/apps") is None
+        True
+    """
+    if not url:
+        return None
+
+    match = _SIGNIN_RE.search(url)
+    return match.group(1) if match else None